@@ -15,15 +15,19 @@ Version: 2.0
 License: MIT
 """
 
+import gc
 import sys
-from typing import List, Tuple
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import numpy as np
 from numpy.typing import NDArray
+from numba import njit, prange
 from PIL import Image, ImageDraw, ImageFilter
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.backends.backend_pdf import PdfPages
 import csv
+from concurrent.futures import ThreadPoolExecutor
 
 
 # ============================================================================
@@ -53,6 +57,7 @@ CIRCLE_RADIUS = int(TARGET_SIZE * CIRCLE_RADIUS_MM / WORKING_AREA_MM)  # Scaled
 NUM_STEPS = 3500  # Maximum number of thread segments (optimized for A3)
 THREAD_STRENGTH = 0.22  # How much brightness is reduced per line (0.0 to 1.0)
 LINE_WEIGHT = 12  # Thickness of the thread line in scoring/drawing
+ANTIALIASED_LINES = True  # Score/draw lines with antialiased (Xiaolin Wu) pixel weights
 
 # Auto-stopping behavior
 AUTO_STOP = True  # If True, stop early when residual image is sufficiently blank
@@ -93,15 +98,45 @@ def generate_nails(num_nails: int, radius: float, center_x: float, center_y: flo
     Returns:
         numpy array of shape (num_nails, 2) with (x, y) coordinates
     """
-    nails = np.zeros((num_nails, 2))
+    nails = radius * _unit_circle(num_nails)
+    nails += (center_x, center_y)
     
+    return nails
+
+
+@lru_cache(maxsize=8)
+def _unit_circle(num_nails: int) -> NDArray[np.float64]:
+    """
+    Get the (cos, sin) of every nail angle on the unit circle (cached, read-only).
+    
+    Args:
+        num_nails: Number of nails on the circle
+    
+    Returns:
+        numpy array of shape (num_nails, 2)
+    """
     # Start from top (90 degrees) for intuitive nail 0 position
-    for i in range(num_nails):
-        angle = (np.pi / 2) + (2 * np.pi * i / num_nails)
-        nails[i, 0] = center_x + radius * np.cos(angle)
-        nails[i, 1] = center_y + radius * np.sin(angle)
+    angles = (np.pi / 2) + (2 * np.pi * np.arange(num_nails) / num_nails)
     
-    return nails
+    unit = np.empty((num_nails, 2), dtype=np.float64)
+    unit[:, 0] = np.cos(angles)
+    unit[:, 1] = np.sin(angles)
+    unit.setflags(write=False)
+    
+    return unit
+
+
+def nail_pixels(nails: NDArray[np.float64]) -> NDArray[np.int32]:
+    """
+    Round nail coordinates to the pixels their thread lines start and end at.
+    
+    Args:
+        nails: Array of nail coordinates
+    
+    Returns:
+        numpy int32 array of shape (num_nails, 2) with (x, y) pixel coordinates
+    """
+    return np.rint(nails).astype(np.int32)
 
 
 # ============================================================================
@@ -136,161 +171,468 @@ def preprocess_image(image_path: str, target_size: int, invert: bool) -> NDArray
     # Resize to target size
     img = img.resize((target_size, target_size), Image.Resampling.LANCZOS)
     
-    # Convert to numpy array (0-255)
-    img_array = np.array(img, dtype=np.float32)
+    # Enhance contrast using histogram equalization (on 8-bit values)
+    img_u8 = equalize_histogram(np.asarray(img))
     
-    # Normalize to 0.0 - 1.0
-    img_array = img_array / 255.0
+    # Convert to float and normalize to 0.0 - 1.0
+    img_array = img_u8.astype(np.float32)
+    img_array *= 1.0 / 255.0
     
     # Invert if needed (dark areas should have high values for more thread)
     if invert:
-        img_array = 1.0 - img_array
-    
-    # Enhance contrast using histogram equalization
-    img_array = enhance_contrast(img_array)
+        np.subtract(1.0, img_array, out=img_array)
     
     return img_array
 
 
-def enhance_contrast(img_array: NDArray[np.float32]) -> NDArray[np.float32]:
+def equalize_histogram(img_u8: NDArray[np.uint8]) -> NDArray[np.uint8]:
     """
-    Enhance contrast of the image using simple normalization.
+    Equalize the histogram of an 8-bit grayscale image using a lookup table.
     
     Args:
-        img_array: Input image as numpy array (0.0 to 1.0)
+        img_u8: Input image as uint8 numpy array
     
     Returns:
-        Contrast-enhanced image
+        Equalized image as uint8 numpy array (full 0-255 range)
     """
-    # Normalize to full range
-    min_val = np.min(img_array)
-    max_val = np.max(img_array)
+    hist = np.bincount(img_u8.ravel(), minlength=256)
+    cdf = np.cumsum(hist)
     
-    if max_val > min_val:
-        img_array = (img_array - min_val) / (max_val - min_val)
+    # Skip leading empty bins so the darkest used level maps to 0
+    cdf_min = cdf[np.flatnonzero(hist)[0]]
+    if cdf[-1] == cdf_min:
+        return img_u8.copy()
     
-    return img_array
+    lut = np.round((cdf - cdf_min) * (255.0 / (cdf[-1] - cdf_min)))
+    lut = np.clip(lut, 0, 255).astype(np.uint8)
+    
+    return lut[img_u8]
 
 
 # ============================================================================
 # LINE DRAWING AND SCORING
 # ============================================================================
 
-def get_line_pixels(x0: float, y0: float, x1: float, y1: float) -> Tuple[NDArray[np.int32], NDArray[np.int32]]:
+@njit(cache=True)
+def _rasterize_line(x0, y0, x1, y1, x_buf, y_buf):
     """
-    Get pixel coordinates along a line using Bresenham's algorithm.
-    
+    Fill x_buf, y_buf with the DDA pixels of the line between integer points.
+
+    The buffers must hold at least max(|dx|, |dy|) + 1 entries; the samples
+    are the same as np.rint(np.linspace(...)) would give.
+
+    Returns:
+        Number of pixels written
+    """
+    n = max(abs(x1 - x0), abs(y1 - y0)) + 1
+    if n > 1:
+        step_x = (x1 - x0) / (n - 1)
+        step_y = (y1 - y0) / (n - 1)
+        for i in range(n - 1):
+            x_buf[i] = int(np.rint(i * step_x + x0))
+            y_buf[i] = int(np.rint(i * step_y + y0))
+    x_buf[n - 1] = x1
+    y_buf[n - 1] = y1
+    return n
+
+
+@njit(cache=True)
+def pair_id(a: int, b: int, num_nails: int) -> int:
+    """
+    Get the index of the unordered nail pair (a, b) in the line lookup table.
+
+    Each line is stored once, since the line from a to b covers the same
+    pixels as the line from b to a. Compiled so the greedy kernel can use it.
+
     Args:
-        x0, y0: Starting point
-        x1, y1: Ending point
-    
+        a, b: Nail indices (order does not matter, a != b)
+        num_nails: Total number of nails
+
     Returns:
-        Two arrays: x_coords, y_coords of pixels along the line
+        Pair index in range [0, num_nails * (num_nails - 1) / 2)
     """
-    x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
-    
-    dx = abs(x1 - x0)
-    dy = abs(y1 - y0)
-    sx = 1 if x0 < x1 else -1
-    sy = 1 if y0 < y1 else -1
-    err = dx - dy
-    
-    x_coords = []
-    y_coords = []
-    
-    x, y = x0, y0
-    
-    while True:
-        x_coords.append(x)
-        y_coords.append(y)
-        
-        if x == x1 and y == y1:
-            break
-        
-        e2 = 2 * err
-        if e2 > -dy:
-            err -= dy
-            x += sx
-        if e2 < dx:
-            err += dx
-            y += sy
-    
-    return np.array(x_coords, dtype=np.int32), np.array(y_coords, dtype=np.int32)
+    if a > b:
+        a, b = b, a
+    return a * num_nails - a * (a + 1) // 2 + (b - a - 1)
 
 
-def score_line(img_array: NDArray[np.float32], x0: float, y0: float, 
-               x1: float, y1: float, line_weight: int) -> float:
+@njit(cache=True)
+def _rasterize_line_aa(x0, y0, x1, y1, x_buf, y_buf, w_buf):
     """
-    Score a potential line by summing pixel intensities along it.
-    Higher score means the line covers darker areas (higher values after inversion).
-    
+    Fill the buffers with Xiaolin Wu antialiased pixels of a line between
+    (sub-pixel) points: at each step along the major axis, the two pixels
+    straddling the line share a weight of 1.
+
+    The buffers must hold at least 2 * (max(|dx|, |dy|) + 2) entries; pixels
+    with zero weight are skipped.
+
+    Returns:
+        Number of pixels written
+    """
+    steep = abs(y1 - y0) > abs(x1 - x0)
+    if steep:
+        x0, y0, x1, y1 = y0, x0, y1, x1
+    if x0 > x1:
+        x0, y0, x1, y1 = x1, y1, x0, y0
+
+    gradient = (y1 - y0) / (x1 - x0) if x1 > x0 else 0.0
+
+    # Major/minor axis outputs are picked once, outside the pixel loop
+    major_buf, minor_buf = (y_buf, x_buf) if steep else (x_buf, y_buf)
+
+    # Both pixels are always written; the count only advances past
+    # nonzero weights, so a zero-weight pixel is overwritten by the next
+    n = 0
+    for x in range(int(np.rint(x0)), int(np.rint(x1)) + 1):
+        y = y0 + gradient * (x - x0)
+        y_floor = np.floor(y)
+        frac = y - y_floor
+        yy = int(y_floor)
+
+        major_buf[n] = x
+        minor_buf[n] = yy
+        w_buf[n] = 1.0 - frac
+        n += frac < 1.0
+
+        major_buf[n] = x
+        minor_buf[n] = yy + 1
+        w_buf[n] = frac
+        n += frac > 0.0
+    return n
+
+
+@njit(cache=True, parallel=True)
+def _rasterize_pairs(nails, nails_i, height, width, antialias):
+    """
+    Rasterize the lines of all nail pairs (a < b, in pair_id order).
+
+    Pairs are rasterized in parallel, each into its own slot sized from the
+    line's pixel count, then the in-bounds pixels are packed together.
+
+    Returns:
+        Three arrays: line_idx (linear pixel indices), offs (pair offsets),
+        line_w (pixel weights)
+    """
+    num_nails = nails_i.shape[0]
+    num_pairs = num_nails * (num_nails - 1) // 2
+
+    # Size each pair's slot from the pixel count of its line
+    pair_a = np.empty(num_pairs, dtype=np.int32)
+    pair_b = np.empty(num_pairs, dtype=np.int32)
+    slots = np.zeros(num_pairs + 1, dtype=np.int64)
+    p = 0
+    for a in range(num_nails):
+        for b in range(a + 1, num_nails):
+            n = max(abs(nails_i[b, 0] - nails_i[a, 0]), abs(nails_i[b, 1] - nails_i[a, 1])) + 1
+            if antialias:
+                n = 2 * (n + 1)
+            pair_a[p] = a
+            pair_b[p] = b
+            slots[p + 1] = slots[p] + n
+            p += 1
+
+    slot_idx = np.empty(slots[num_pairs], dtype=np.uint32)
+    slot_w = np.empty(slots[num_pairs], dtype=np.float32)
+    counts = np.empty(num_pairs, dtype=np.int32)
+
+    for p in prange(num_pairs):
+        a = pair_a[p]
+        b = pair_b[p]
+        n = slots[p + 1] - slots[p]
+        x_buf = np.empty(n, dtype=np.int32)
+        y_buf = np.empty(n, dtype=np.int32)
+        w_buf = np.ones(n, dtype=np.float32)
+        if antialias:
+            n = _rasterize_line_aa(nails[a, 0], nails[a, 1], nails[b, 0], nails[b, 1],
+                                   x_buf, y_buf, w_buf)
+        else:
+            n = _rasterize_line(nails_i[a, 0], nails_i[a, 1], nails_i[b, 0], nails_i[b, 1],
+                                x_buf, y_buf)
+
+        # Keep in-bounds pixels only
+        pos = slots[p]
+        for i in range(n):
+            x = x_buf[i]
+            y = y_buf[i]
+            if 0 <= x < width and 0 <= y < height:
+                slot_idx[pos] = y * width + x
+                slot_w[pos] = w_buf[i]
+                pos += 1
+        counts[p] = pos - slots[p]
+
+    offs = np.zeros(num_pairs + 1, dtype=np.int32)
+    for p in range(num_pairs):
+        offs[p + 1] = offs[p] + counts[p]
+
+    line_idx = np.empty(offs[num_pairs], dtype=np.uint32)
+    line_w = np.empty(offs[num_pairs], dtype=np.float32)
+    for p in prange(num_pairs):
+        src = slots[p]
+        for j in range(offs[p], offs[p + 1]):
+            line_idx[j] = slot_idx[src]
+            line_w[j] = slot_w[src]
+            src += 1
+
+    return line_idx, offs, line_w
+
+
+def precompute_line_index(nails: NDArray[np.float64], height: int, width: int,
+                          antialias: bool) -> Tuple[NDArray[np.uint32], NDArray[np.int32], NDArray[np.float32]]:
+    """
+    Rasterize the line between every unordered pair of nails once.
+
+    The pixels of all lines are stored as linear indices (y * width + x) in a
+    single flat array; the pixels of pair p are line_idx[offs[p]:offs[p + 1]],
+    where p = pair_id(a, b, num_nails), with matching weights in line_w.
+
     Args:
-        img_array: Current image state
-        x0, y0: Starting nail coordinates
-        x1, y1: Ending nail coordinates
-        line_weight: Thickness of line for scoring
-    
+        nails: Array of nail coordinates
+        height, width: Image dimensions
+        antialias: Use Xiaolin Wu antialiased pixels and weights (otherwise
+                   DDA pixels between rounded nail positions, all weighted 1)
+
     Returns:
-        Score value (higher is better)
+        Three arrays: line_idx (linear pixel indices), offs (pair offsets),
+        line_w (pixel weights)
     """
-    height, width = img_array.shape
-    
-    # Get base line pixels
-    x_coords, y_coords = get_line_pixels(x0, y0, x1, y1)
-    
-    # Filter out-of-bounds pixels
-    valid = (x_coords >= 0) & (x_coords < width) & (y_coords >= 0) & (y_coords < height)
-    x_coords = x_coords[valid]
-    y_coords = y_coords[valid]
-    
-    if len(x_coords) == 0:
-        return 0.0
-    
-    # Sum intensities along the line
-    score = np.sum(img_array[y_coords, x_coords])
-    
-    return float(score)
+    return _rasterize_pairs(nails, nail_pixels(nails), height, width, antialias)
 
 
-def draw_line(img_array: NDArray[np.float32], x0: float, y0: float, 
-              x1: float, y1: float, strength: float, line_weight: int) -> None:
+@njit(cache=True, nogil=True)
+def _transpose_lines(line_idx, offs, line_w, num_pixels):
     """
-    Draw a line on the image by reducing pixel intensities.
-    
+    Transpose the line -> pixel table into a pixel -> line table.
+
+    Counting pass plus scatter, as in a CSR to CSC conversion; the pairs of
+    each pixel come out in increasing pair order.
+
+    Returns:
+        Three arrays: pixel_pairs (pair indices), pixel_offs (pixel offsets),
+        pixel_w (weights)
+    """
+    num_pairs = offs.shape[0] - 1
+
+    pixel_offs = np.zeros(num_pixels + 1, dtype=np.int32)
+    for j in range(line_idx.shape[0]):
+        pixel_offs[line_idx[j] + 1] += 1
+    for q in range(num_pixels):
+        pixel_offs[q + 1] += pixel_offs[q]
+
+    pixel_pairs = np.empty(line_idx.shape[0], dtype=np.int32)
+    pixel_w = np.empty(line_idx.shape[0], dtype=np.float32)
+    fill = pixel_offs[:-1].copy()
+    for p in range(num_pairs):
+        for j in range(offs[p], offs[p + 1]):
+            q = line_idx[j]
+            pixel_pairs[fill[q]] = p
+            pixel_w[fill[q]] = line_w[j]
+            fill[q] += 1
+
+    return pixel_pairs, pixel_offs, pixel_w
+
+
+def precompute_pixel_pairs(line_idx: NDArray[np.uint32], offs: NDArray[np.int32],
+                           line_w: NDArray[np.float32], num_pixels: int
+                           ) -> Tuple[NDArray[np.int32], NDArray[np.int32], NDArray[np.float32]]:
+    """
+    Invert the line lookup table: list the nail pairs whose line covers each pixel.
+
+    (line_idx, offs, line_w) is the CSR layout of the sparse pair x pixel
+    weight matrix; this returns its transpose in the same layout. The pairs
+    covering linear pixel q are pixel_pairs[pixel_offs[q]:pixel_offs[q + 1]],
+    with matching weights in pixel_w.
+
     Args:
-        img_array: Image array to modify (in-place)
-        x0, y0: Starting nail coordinates
-        x1, y1: Ending nail coordinates
-        strength: How much to reduce brightness (0.0 to 1.0)
-        line_weight: Thickness of line
+        line_idx: Linear pixel indices from precompute_line_index()
+        offs: Pair offsets from precompute_line_index()
+        line_w: Pixel weights from precompute_line_index()
+        num_pixels: Number of pixels in the image (height * width)
+
+    Returns:
+        Three arrays: pixel_pairs (pair indices), pixel_offs (pixel offsets),
+        pixel_w (weights)
     """
-    height, width = img_array.shape
-    
-    # Get line pixels
-    x_coords, y_coords = get_line_pixels(x0, y0, x1, y1)
-    
-    # Filter out-of-bounds pixels
-    valid = (x_coords >= 0) & (x_coords < width) & (y_coords >= 0) & (y_coords < height)
-    x_coords = x_coords[valid]
-    y_coords = y_coords[valid]
-    
-    if len(x_coords) == 0:
-        return
-    
-    # Reduce brightness along the line
-    img_array[y_coords, x_coords] -= strength
-    
-    # Clamp to valid range
-    img_array[y_coords, x_coords] = np.maximum(img_array[y_coords, x_coords], 0.0)
+    return _transpose_lines(line_idx, offs, line_w, num_pixels)
 
 
 # ============================================================================
 # STRING ART ALGORITHM
 # ============================================================================
 
+# Residual maxima are tracked per square tile of 1 << _TILE_SHIFT pixels
+_TILE_SHIFT = 5
+
+# Reasons for _greedy_loop() to return before completing all of its steps
+_STOP_NONE = 0
+_STOP_RESIDUAL = 1
+_STOP_NO_IMPROVE = 2
+
+
+@njit(cache=True)
+def _update_tile_max(flat, height, width, tile_shift, tile_max, ty, tx):
+    """
+    Recompute the max of one (1 << tile_shift)-pixel square tile of the flat image.
+    """
+    y0 = ty << tile_shift
+    x0 = tx << tile_shift
+    y1 = min(y0 + (1 << tile_shift), height)
+    x1 = min(x0 + (1 << tile_shift), width)
+
+    m = np.float32(0.0)
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            v = flat[y * width + x]
+            if v > m:
+                m = v
+    tile_max[ty, tx] = m
+
+
+@njit(cache=True, nogil=True)
+def _compute_tile_max(flat, height, width, tile_shift):
+    """
+    Compute the max of every square tile of the flat image.
+
+    Returns:
+        2-D array of tile maxima
+    """
+    tiles_y = (height + (1 << tile_shift) - 1) >> tile_shift
+    tiles_x = (width + (1 << tile_shift) - 1) >> tile_shift
+    tile_max = np.zeros((tiles_y, tiles_x), dtype=np.float32)
+
+    for ty in range(tiles_y):
+        for tx in range(tiles_x):
+            _update_tile_max(flat, height, width, tile_shift, tile_max, ty, tx)
+
+    return tile_max
+
+
+@njit(cache=True, nogil=True, parallel=True, fastmath=True)
+def _line_scores(flat, line_idx, line_offs, line_w):
+    """
+    Sum the weighted working image along every precomputed line in a single pass.
+
+    Returns:
+        Array of line scores indexed by pair_id()
+    """
+    num_pairs = line_offs.shape[0] - 1
+    scores = np.empty(num_pairs, dtype=np.float64)
+
+    for p in prange(num_pairs):
+        s = 0.0
+        for j in range(line_offs[p], line_offs[p + 1]):
+            s += flat[line_idx[j]] * line_w[j]
+        scores[p] = s
+
+    return scores
+
+
+@njit(cache=True, nogil=True)
+def _greedy_loop(flat, height, width, line_idx, line_offs, line_w, pixel_pairs,
+                 pixel_offs, pixel_w, pair_scores, tile_max, num_nails, current,
+                 max_steps, strength, thresh, max_no_improve, no_improve, out):
+    """
+    Run up to max_steps greedy steps on the flat working image (in-place).
+
+    pair_scores holds the current score of every line and is kept up to date
+    while drawing: each pixel's actual reduction is subtracted, times that
+    line's weight at the pixel, from the score of every line through it, so
+    no line is ever rescored. Only the chosen line is re-summed exactly, so
+    rounding drift cannot hide that it no longer improves anything.
+
+    tile_max holds the max of every tile (see _compute_tile_max()). Pixels
+    only ever get darker, so a tile is rescanned only when a drawn pixel
+    held its max, and the auto-stop check reads tile maxima only.
+
+    Chosen segments are written to out[step] = (from_nail, to_nail).
+
+    Returns:
+        Tuple (steps_done, current_nail, no_improve, stop_reason)
+    """
+    dirty = np.zeros(tile_max.shape, dtype=np.bool_)
+    dirty_y = np.empty(tile_max.size, dtype=np.int64)
+    dirty_x = np.empty(tile_max.size, dtype=np.int64)
+
+    for step in range(max_steps):
+        # Auto-stop if residual image is mostly blank
+        if tile_max.max() <= thresh:
+            return step, current, no_improve, _STOP_RESIDUAL
+
+        # Pick the best cached line from the current nail. Lines to lower
+        # nails sit in earlier rows of the table (stride shrinks by one per
+        # row), lines to higher nails are one contiguous run in its own row.
+        best_score = -np.inf
+        best_nail = -1
+        p = current - 1
+        for c in range(current):
+            score = pair_scores[p]
+            if score > best_score:
+                best_score = score
+                best_nail = c
+            p += num_nails - c - 2
+        p = pair_id(current, current + 1, num_nails)
+        for c in range(current + 1, num_nails):
+            score = pair_scores[p + c - current - 1]
+            if score > best_score:
+                best_score = score
+                best_nail = c
+
+        # Re-sum the chosen line exactly: cached scores drift by rounding
+        # error, so a line over blank pixels could keep a tiny positive score
+        p = pair_id(current, best_nail, num_nails)
+        best_score = 0.0
+        for j in range(line_offs[p], line_offs[p + 1]):
+            best_score += flat[line_idx[j]] * line_w[j]
+        pair_scores[p] = best_score
+
+        # If best score is non-positive, count as no improvement
+        if best_score <= 0:
+            no_improve += 1
+            if no_improve >= max_no_improve:
+                return step, current, no_improve, _STOP_NO_IMPROVE
+        else:
+            no_improve = 0
+
+        # Apply the best line (reduce brightness and clamp to valid range),
+        # then remove each pixel's reduction from the lines through it
+        num_dirty = 0
+        for j in range(line_offs[p], line_offs[p + 1]):
+            q = np.int64(line_idx[j])
+            v = flat[q]
+            reduction = strength * line_w[j]
+            delta = reduction if v > reduction else v
+            if delta <= 0:
+                # Already blank: no line through this pixel changes score
+                continue
+            flat[q] = v - delta
+            for k in range(pixel_offs[q], pixel_offs[q + 1]):
+                pair_scores[pixel_pairs[k]] -= delta * pixel_w[k]
+
+            # The tile max can only have dropped if this pixel held it
+            ty = (q // width) >> _TILE_SHIFT
+            tx = (q % width) >> _TILE_SHIFT
+            if v >= tile_max[ty, tx] and not dirty[ty, tx]:
+                dirty[ty, tx] = True
+                dirty_y[num_dirty] = ty
+                dirty_x[num_dirty] = tx
+                num_dirty += 1
+
+        for i in range(num_dirty):
+            _update_tile_max(flat, height, width, _TILE_SHIFT, tile_max, dirty_y[i], dirty_x[i])
+            dirty[dirty_y[i], dirty_x[i]] = False
+
+        out[step, 0] = current
+        out[step, 1] = best_nail
+        current = best_nail
+
+    return max_steps, current, no_improve, _STOP_NONE
+
+
 def simulate_string_art(img_array: NDArray[np.float32], nails: NDArray[np.float64], 
                        num_steps: int, thread_strength: float, 
-                       line_weight: int) -> List[Tuple[int, int]]:
+                       line_weight: int,
+                       line_table: Optional[Tuple[NDArray[np.uint32], NDArray[np.int32],
+                                                  NDArray[np.float32]]] = None
+                       ) -> List[Tuple[int, int]]:
     """
     Simulate the string art generation process with intelligent auto-stopping.
     
@@ -298,6 +640,9 @@ def simulate_string_art(img_array: NDArray[np.float32], nails: NDArray[np.float6
     algorithm will stop early when the residual image becomes sufficiently
     blank (no high-value pixels remain) or when there is no improvement for
     many consecutive steps.
+
+    The greedy steps themselves run in the compiled _greedy_loop() kernel,
+    in batches of 100 steps between progress reports.
     
     Args:
         img_array: Preprocessed target image
@@ -305,69 +650,62 @@ def simulate_string_art(img_array: NDArray[np.float32], nails: NDArray[np.float6
         num_steps: Number of thread segments to generate
         thread_strength: Brightness reduction per line
         line_weight: Line thickness
+        line_table: Result of precompute_line_index() for these nails and
+                    the image size (computed here if not given)
     
     Returns:
         List of tuples (from_nail, to_nail) representing the thread path
     """
-    # Create working copy of the image
-    working_img = img_array.copy()
-    
+    # Create float32 working copy of the image (flat view shares its memory)
+    working_img = img_array.astype(np.float32)
+    flat = working_img.ravel()
+
     # Initialize
     num_nails = len(nails)
+    height, width = working_img.shape
+
+    if num_nails < 2:
+        print("  Warning: No valid nail found at step 0")
+        return []
+
+    if line_table is None:
+        print(f"Precomputing line pixels for {num_nails * (num_nails - 1) // 2} nail pairs...")
+        line_table = precompute_line_index(nails, height, width, ANTIALIASED_LINES)
+    line_idx, line_offs, line_w = line_table
+    pixel_pairs, pixel_offs, pixel_w = precompute_pixel_pairs(line_idx, line_offs, line_w, flat.size)
+
+    # Initial score of every line; updated incrementally from here on
+    pair_scores = _line_scores(flat, line_idx, line_offs, line_w)
+    tile_max = _compute_tile_max(flat, height, width, _TILE_SHIFT)
+
     current_nail = 0
-    instructions: List[Tuple[int, int]] = []
+    path = np.zeros((num_steps, 2), dtype=np.int32)
+    thresh = RESIDUAL_THRESHOLD if AUTO_STOP else -1.0
+    strength = np.float32(thread_strength)  # Keep pixel updates in float32
     
     print(f"Generating up to {num_steps} thread segments (AUTO_STOP={AUTO_STOP})...")
     no_improve = 0
+    step = 0
     
-    for step in range(num_steps):
-        if step % 100 == 0:
-            print(f"  Step {step}/{num_steps} - max residual {working_img.max():.4f}")
-
-        # Auto-stop if residual image is mostly blank
-        if AUTO_STOP and working_img.max() <= RESIDUAL_THRESHOLD:
-            print(f"  Residual below threshold ({working_img.max():.4f} <= {RESIDUAL_THRESHOLD}); stopping at step {step}.")
-            break
-
-        best_score = -1.0
-        best_nail = -1
-
-        # Try all other nails
-        for next_nail in range(num_nails):
-            if next_nail == current_nail:
-                continue
-
-            # Get coordinates
-            x0, y0 = nails[current_nail]
-            x1, y1 = nails[next_nail]
-
-            # Score this line
-            score = score_line(working_img, x0, y0, x1, y1, line_weight)
-
-            if score > best_score:
-                best_score = score
-                best_nail = next_nail
-
-        # If best score is non-positive, count as no improvement
-        if best_score <= 0 or best_nail == -1:
-            no_improve += 1
-            if no_improve >= MAX_NO_IMPROVE:
-                print(f"  No improvement for {no_improve} consecutive steps; stopping at step {step}.")
-                break
-            if best_nail == -1:
-                print(f"  Warning: No valid nail found at step {step}")
-                break
-        else:
-            no_improve = 0
+    while step < num_steps:
+        print(f"  Step {step}/{num_steps} - max residual {tile_max.max():.4f}")
 
-        # Apply the best line
-        x0, y0 = nails[current_nail]
-        x1, y1 = nails[best_nail]
-        draw_line(working_img, x0, y0, x1, y1, thread_strength, line_weight)
+        batch = min(100, num_steps - step)
+        done, current_nail, no_improve, reason = _greedy_loop(
+            flat, height, width, line_idx, line_offs, line_w, pixel_pairs,
+            pixel_offs, pixel_w, pair_scores, tile_max, num_nails, current_nail,
+            batch, strength, thresh, MAX_NO_IMPROVE, no_improve,
+            path[step:step + batch])
+        step += done
 
-        instructions.append((current_nail, best_nail))
-        current_nail = best_nail
+        if reason == _STOP_RESIDUAL:
+            print(f"  Residual below threshold ({tile_max.max():.4f} <= {RESIDUAL_THRESHOLD}); stopping at step {step}.")
+            break
+        if reason == _STOP_NO_IMPROVE:
+            print(f"  No improvement for {no_improve} consecutive steps; stopping at step {step}.")
+            break
 
+    instructions: List[Tuple[int, int]] = [(int(a), int(b)) for a, b in path[:step]]
     
     print(f"String art generation complete! Generated {len(instructions)} segments.")
     return instructions
@@ -377,19 +715,21 @@ def simulate_string_art(img_array: NDArray[np.float32], nails: NDArray[np.float6
 # OUTPUT GENERATION
 # ============================================================================
 
-def export_scheme_as_png(nails, radius, center_x, center_y, filename, dpi):
+def _build_scheme_figure(nails, radius, center_x, center_y, dpi):
     """
-    Export the nail scheme as a PNG image sized for A3 paper with enhanced readability.
+    Build the A3 nail scheme figure shared by the PNG and PDF exports.
     
     Args:
         nails: Array of nail coordinates
         radius: Circle radius
         center_x, center_y: Circle center
-        filename: Output filename
-        dpi: Resolution for output
+        dpi: Resolution the scheme is laid out for
+    
+    Returns:
+        matplotlib Figure with the scheme drawn
     """
     # Create figure for A3 paper
-    fig, ax = plt.subplots(figsize=(A3_WIDTH_IN, A3_HEIGHT_IN), dpi=dpi)
+    fig, ax = plt.subplots(figsize=(A3_WIDTH_IN, A3_HEIGHT_IN))
 
     # Determine drawing area (leave margins)
     margin_in = MARGIN_MM / 25.4  # Convert mm to inches
@@ -400,15 +740,15 @@ def export_scheme_as_png(nails, radius, center_x, center_y, filename, dpi):
     
     # Compute scale factor from TARGET_SIZE to drawable_size_px
     scale = drawable_size_px / TARGET_SIZE
+    offset_x = margin_in * dpi + (drawable_w * dpi - drawable_size_px) / 2
+    offset_y = margin_in * dpi + (drawable_h * dpi - drawable_size_px) / 2
     
     # Apply scale and translation to nails for plotting
-    nails_plot = nails.copy()
-    nails_plot[:, 0] = nails[:, 0] * scale + margin_in * dpi + (drawable_w * dpi - drawable_size_px) / 2
-    nails_plot[:, 1] = nails[:, 1] * scale + margin_in * dpi + (drawable_h * dpi - drawable_size_px) / 2
+    nails_plot = nails * scale + np.array([offset_x, offset_y])
     
     # Adjust center and radius for plotting
-    center_x_plot = center_x * scale + margin_in * dpi + (drawable_w * dpi - drawable_size_px) / 2
-    center_y_plot = center_y * scale + margin_in * dpi + (drawable_h * dpi - drawable_size_px) / 2
+    center_x_plot = center_x * scale + offset_x
+    center_y_plot = center_y * scale + offset_y
     radius_plot = radius * scale
 
     # Draw reference grid for easier nail placement
@@ -436,32 +776,32 @@ def export_scheme_as_png(nails, radius, center_x, center_y, filename, dpi):
     font_size = max(NAIL_NUMBER_FONT_SIZE_BASE, int(NAIL_NUMBER_FONT_SIZE_BASE * (200 / len(nails))))
     offset_distance_px = (NAIL_NUMBER_OFFSET_MM / 25.4) * dpi
 
-    # Draw nails with improved numbering
-    for i, (x, y) in enumerate(nails_plot):
-        # Determine if this nail should be highlighted
-        is_milestone = (i % HIGHLIGHT_EVERY_NTH_NAIL == 0) and i > 0
-        
-        # Draw nail point
-        nail_size = 8 if is_milestone else 5
-        nail_color = 'red' if is_milestone else 'black'
-        ax.plot(x, y, 'o', color=nail_color, markersize=nail_size, 
-               markeredgecolor='black', markeredgewidth=0.5)
-        
-        # Calculate offset for number placement
-        dx = x - center_x_plot
-        dy = y - center_y_plot
-        dist = np.sqrt(dx*dx + dy*dy)
-        if dist > 0:
-            offset_x = x + (dx / dist) * offset_distance_px
-            offset_y = y + (dy / dist) * offset_distance_px
-        else:
-            offset_x, offset_y = x, y
-        
-        # Draw number with enhanced readability
-        bbox_props = dict(boxstyle='round,pad=0.4', fc='white', ec='black', linewidth=1.5 if is_milestone else 0.8)
-        text_weight = 'bold' if is_milestone else 'normal'
-        ax.text(offset_x, offset_y, str(i), fontsize=font_size,
-               ha='center', va='center', bbox=bbox_props, weight=text_weight)
+    # Every Nth nail (except nail 0) is highlighted
+    nail_ids = np.arange(len(nails))
+    milestone = (nail_ids % HIGHLIGHT_EVERY_NTH_NAIL == 0) & (nail_ids > 0)
+
+    # Draw nail points, one scatter per marker style (zorder of plotted lines)
+    for mask, nail_size, nail_color in ((~milestone, 5, 'black'), (milestone, 8, 'red')):
+        ax.scatter(nails_plot[mask, 0], nails_plot[mask, 1], s=nail_size ** 2, c=nail_color,
+                   edgecolors='black', linewidths=0.5, zorder=2)
+
+    # Calculate offsets for number placement (radially outward)
+    dx = nails_plot[:, 0] - center_x_plot
+    dy = nails_plot[:, 1] - center_y_plot
+    dist = np.hypot(dx, dy)
+    safe_dist = np.where(dist > 0, dist, 1.0)
+    text_x = nails_plot[:, 0] + np.where(dist > 0, dx / safe_dist * offset_distance_px, 0.0)
+    text_y = nails_plot[:, 1] + np.where(dist > 0, dy / safe_dist * offset_distance_px, 0.0)
+
+    # Draw numbers with enhanced readability
+    bbox_normal = dict(boxstyle='round,pad=0.4', fc='white', ec='black', linewidth=0.8)
+    bbox_milestone = dict(boxstyle='round,pad=0.4', fc='white', ec='black', linewidth=1.5)
+    for i in range(len(nails)):
+        is_milestone = milestone[i]
+        ax.text(text_x[i], text_y[i], str(i), fontsize=font_size,
+               ha='center', va='center',
+               bbox=bbox_milestone if is_milestone else bbox_normal,
+               weight='bold' if is_milestone else 'normal')
 
     # Set equal aspect and limits in pixels
     ax.set_aspect('equal')
@@ -488,16 +828,14 @@ def export_scheme_as_png(nails, radius, center_x, center_y, filename, dpi):
     ax.text(legend_x, legend_y + 25, f'● Every {HIGHLIGHT_EVERY_NTH_NAIL}th nail', 
            fontsize=10, color='red')
 
-    plt.tight_layout()
-    plt.savefig(filename, dpi=dpi, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
 
-    print(f"Scheme saved as PNG: {filename}")
+    return fig
 
 
-def export_scheme_as_pdf(nails, radius, center_x, center_y, filename, dpi):
+def export_scheme_as_png(nails, radius, center_x, center_y, filename, dpi, fig=None):
     """
-    Export the nail scheme as a PDF sized for A3 paper with enhanced readability.
+    Export the nail scheme as a PNG image sized for A3 paper with enhanced readability.
     
     Args:
         nails: Array of nail coordinates
@@ -505,103 +843,39 @@ def export_scheme_as_pdf(nails, radius, center_x, center_y, filename, dpi):
         center_x, center_y: Circle center
         filename: Output filename
         dpi: Resolution for output
+        fig: Scheme figure from _build_scheme_figure() to reuse (left open)
     """
-    # Create figure for A3
-    fig, ax = plt.subplots(figsize=(A3_WIDTH_IN, A3_HEIGHT_IN))
-
-    # Compute margins and drawable area
-    margin_in = MARGIN_MM / 25.4  # Convert mm to inches
-    drawable_w = A3_WIDTH_IN - 2 * margin_in
-    drawable_h = A3_HEIGHT_IN - 2 * margin_in
-    drawable_size_in = min(drawable_w, drawable_h)
-    drawable_size_px = drawable_size_in * dpi
-
-    scale = drawable_size_px / TARGET_SIZE
-
-    nails_plot = nails.copy()
-    nails_plot[:, 0] = nails[:, 0] * scale + margin_in * dpi + (drawable_w * dpi - drawable_size_px) / 2
-    nails_plot[:, 1] = nails[:, 1] * scale + margin_in * dpi + (drawable_h * dpi - drawable_size_px) / 2
-
-    center_x_plot = center_x * scale + margin_in * dpi + (drawable_w * dpi - drawable_size_px) / 2
-    center_y_plot = center_y * scale + margin_in * dpi + (drawable_h * dpi - drawable_size_px) / 2
-    radius_plot = radius * scale
-
-    # Draw reference grid
-    for angle in range(0, 360, 30):
-        angle_rad = np.radians(angle)
-        x_inner = center_x_plot + radius_plot * 0.95 * np.cos(angle_rad)
-        y_inner = center_y_plot + radius_plot * 0.95 * np.sin(angle_rad)
-        x_outer = center_x_plot + radius_plot * 1.05 * np.cos(angle_rad)
-        y_outer = center_y_plot + radius_plot * 1.05 * np.sin(angle_rad)
-        ax.plot([x_inner, x_outer], [y_inner, y_outer], 'gray', linewidth=0.5, alpha=0.3)
-
-    # Draw circle
-    circle = patches.Circle((center_x_plot, center_y_plot), radius_plot, fill=False,
-                           edgecolor='black', linewidth=2.5)
-    ax.add_patch(circle)
-
-    # Draw start marker
-    start_angle = np.radians(90)
-    marker_size = 15
-    x_start = center_x_plot + radius_plot * np.cos(start_angle)
-    y_start = center_y_plot + radius_plot * np.sin(start_angle)
-    ax.plot(x_start, y_start, 'r*', markersize=marker_size, markeredgecolor='black', markeredgewidth=1.5)
-
-    # Calculate font size and offset
-    font_size = max(NAIL_NUMBER_FONT_SIZE_BASE, int(NAIL_NUMBER_FONT_SIZE_BASE * (200 / len(nails))))
-    offset_distance_px = (NAIL_NUMBER_OFFSET_MM / 25.4) * dpi
+    owns_fig = fig is None
+    if owns_fig:
+        fig = _build_scheme_figure(nails, radius, center_x, center_y, dpi)
+    fig.savefig(filename, dpi=dpi, bbox_inches='tight')
+    if owns_fig:
+        fig.clf()
+        plt.close(fig)
 
-    # Draw nails with numbers
-    for i, (x, y) in enumerate(nails_plot):
-        is_milestone = (i % HIGHLIGHT_EVERY_NTH_NAIL == 0) and i > 0
-        
-        nail_size = 8 if is_milestone else 5
-        nail_color = 'red' if is_milestone else 'black'
-        ax.plot(x, y, 'o', color=nail_color, markersize=nail_size,
-               markeredgecolor='black', markeredgewidth=0.5)
-        
-        dx = x - center_x_plot
-        dy = y - center_y_plot
-        dist = np.sqrt(dx*dx + dy*dy)
-        if dist > 0:
-            offset_x = x + (dx / dist) * offset_distance_px
-            offset_y = y + (dy / dist) * offset_distance_px
-        else:
-            offset_x, offset_y = x, y
-        
-        bbox_props = dict(boxstyle='round,pad=0.4', fc='white', ec='black', 
-                         linewidth=1.5 if is_milestone else 0.8)
-        text_weight = 'bold' if is_milestone else 'normal'
-        ax.text(offset_x, offset_y, str(i), fontsize=font_size,
-               ha='center', va='center', bbox=bbox_props, weight=text_weight)
+    print(f"Scheme saved as PNG: {filename}")
 
-    ax.set_aspect('equal')
-    ax.set_xlim(0, A3_WIDTH_IN * dpi)
-    ax.set_ylim(0, A3_HEIGHT_IN * dpi)
-    ax.invert_yaxis()
-    ax.axis('off')
 
-    # Add title and dimensions
-    title_y = margin_in * dpi * 0.4
-    ax.text(A3_WIDTH_IN * dpi / 2, title_y,
-            f'String Art Nail Scheme - {len(nails)} nails (A3 Format)',
-            fontsize=18, ha='center', va='center', weight='bold')
-    
-    ax.text(A3_WIDTH_IN * dpi / 2, title_y + 30,
-            f'Circle Diameter: {CIRCLE_RADIUS_MM * 2:.0f}mm | Margin: {MARGIN_MM}mm',
-            fontsize=12, ha='center', va='center', style='italic')
+def export_scheme_as_pdf(nails, radius, center_x, center_y, filename, dpi, fig=None):
+    """
+    Export the nail scheme as a PDF sized for A3 paper with enhanced readability.
     
-    # Add legend
-    legend_x = margin_in * dpi * 0.7
-    legend_y = A3_HEIGHT_IN * dpi - margin_in * dpi * 0.5
-    ax.text(legend_x, legend_y, '★ Start (Nail 0)', fontsize=10, color='red', weight='bold')
-    ax.text(legend_x, legend_y + 25, f'● Every {HIGHLIGHT_EVERY_NTH_NAIL}th nail',
-           fontsize=10, color='red')
-
-    plt.tight_layout()
+    Args:
+        nails: Array of nail coordinates
+        radius: Circle radius
+        center_x, center_y: Circle center
+        filename: Output filename
+        dpi: Resolution for output
+        fig: Scheme figure from _build_scheme_figure() to reuse (left open)
+    """
+    owns_fig = fig is None
+    if owns_fig:
+        fig = _build_scheme_figure(nails, radius, center_x, center_y, dpi)
     with PdfPages(filename) as pdf:
         pdf.savefig(fig, dpi=dpi, bbox_inches='tight')
-    plt.close()
+    if owns_fig:
+        fig.clf()
+        plt.close(fig)
 
     print(f"Scheme saved as PDF: {filename}")
 
@@ -620,38 +894,40 @@ def export_instructions_csv(instructions, nails, filename):
         writer.writerow(['Step', 'From_Nail', 'To_Nail', 'Length_mm', 'Angle_deg', 'Progress_%', 'Section'])
         
         total_steps = len(instructions)
-        total_length = 0.0
         
         # Calculate physical scale: pixels to mm
         px_to_mm = (CIRCLE_RADIUS_MM * 2) / (CIRCLE_RADIUS * 2)
         
-        for i, (from_nail, to_nail) in enumerate(instructions, 1):
-            # Calculate segment length in pixels, then convert to mm
-            x0, y0 = nails[from_nail]
-            x1, y1 = nails[to_nail]
-            length_px = np.sqrt((x1 - x0)**2 + (y1 - y0)**2)
-            length_mm = length_px * px_to_mm
-            total_length += length_mm
-            
-            # Calculate angle relative to horizontal (0-360 degrees)
-            angle_rad = np.arctan2(y1 - y0, x1 - x0)
-            angle_deg = (np.degrees(angle_rad) + 360) % 360
-            
-            # Calculate progress percentage
-            progress = (i / total_steps) * 100
-            
-            # Determine section (divide into 10 sections for easier execution)
-            section = (i - 1) // (total_steps // 10 + 1) + 1
-            
-            writer.writerow([
-                i, 
-                from_nail, 
-                to_nail, 
-                f"{length_mm:.1f}",
-                f"{angle_deg:.1f}",
-                f"{progress:.1f}",
-                section
-            ])
+        # Segment endpoints for all steps at once
+        path = np.asarray(instructions, dtype=np.intp).reshape(-1, 2)
+        from_nails = path[:, 0]
+        to_nails = path[:, 1]
+        dx = nails[to_nails, 0] - nails[from_nails, 0]
+        dy = nails[to_nails, 1] - nails[from_nails, 1]
+        
+        # Calculate segment lengths in pixels, then convert to mm
+        # (same sqrt expression and summation order as per-segment math, so
+        # lengths round identically in the .1f columns)
+        length_mm = np.sqrt(dx**2 + dy**2) * px_to_mm
+        total_length = sum(length_mm.tolist())
+        
+        # Calculate angles relative to horizontal (0-360 degrees)
+        angle_deg = (np.degrees(np.arctan2(dy, dx)) + 360) % 360
+        
+        # Calculate progress percentage
+        steps = np.arange(1, total_steps + 1)
+        progress = (steps / max(total_steps, 1)) * 100
+        
+        # Determine section (divide into 10 sections for easier execution)
+        sections = (steps - 1) // (total_steps // 10 + 1) + 1
+        
+        # Stream rows so only one formatted row exists at a time
+        writer.writerows(
+            (step, from_nail, to_nail, f"{length:.1f}", f"{angle:.1f}", f"{pct:.1f}", section)
+            for step, from_nail, to_nail, length, angle, pct, section in zip(
+                steps.tolist(), from_nails.tolist(), to_nails.tolist(),
+                length_mm.tolist(), angle_deg.tolist(), progress.tolist(), sections.tolist())
+        )
         
         # Add summary row
         writer.writerow([])
@@ -678,16 +954,59 @@ def export_instructions_txt(instructions, filename):
         f.write("STRING ART INSTRUCTIONS\n")
         f.write("=" * 50 + "\n\n")
         
-        for i, (from_nail, to_nail) in enumerate(instructions, 1):
-            f.write(f"Step {i:4d}: Connect nail {from_nail:3d} to nail {to_nail:3d}\n")
+        # Hand all lines to one buffered write call
+        f.writelines(
+            f"Step {i:4d}: Connect nail {from_nail:3d} to nail {to_nail:3d}\n"
+            for i, (from_nail, to_nail) in enumerate(instructions, 1)
+        )
     
     print(f"Instructions saved as TXT: {filename}")
 
 
+@njit(cache=True, nogil=True)
+def _count_passes(nails_i, path, line_width, passes):
+    """
+    Add one pass to every pixel under each segment of path (in-place).
+
+    Segments are DDA lines between the nail pixels, widened to line_width
+    pixels by repeating them along their minor axis.
+    """
+    height, width = passes.shape
+
+    # One pair of raster buffers, long enough for any line between two nails
+    max_len = max(nails_i[:, 0].max() - nails_i[:, 0].min(),
+                  nails_i[:, 1].max() - nails_i[:, 1].min()) + 1
+    x_buf = np.empty(max_len, dtype=np.int32)
+    y_buf = np.empty(max_len, dtype=np.int32)
+
+    for s in range(path.shape[0]):
+        a = path[s, 0]
+        b = path[s, 1]
+        x0 = nails_i[a, 0]
+        y0 = nails_i[a, 1]
+        x1 = nails_i[b, 0]
+        y1 = nails_i[b, 1]
+        n = _rasterize_line(x0, y0, x1, y1, x_buf, y_buf)
+
+        shift_y = abs(x1 - x0) >= abs(y1 - y0)
+        for w in range(line_width):
+            shift = w - (line_width - 1) // 2
+            for i in range(n):
+                x = x_buf[i]
+                y = y_buf[i]
+                if shift_y:
+                    y += shift
+                else:
+                    x += shift
+                if 0 <= x < width and 0 <= y < height:
+                    passes[y, x] += 1
+
+
 def render_drawing_simulation(instructions, nails, canvas_size, filename, dpi):
     """
     Render a realistic simulation showing how the finished string art will look.
-    Uses layered semi-transparent thread lines with alpha compositing for realism.
+    Each thread pass over a pixel darkens it like a semi-transparent layer,
+    so the canvas is the paper color times (1 - alpha) ** passes.
     
     Args:
         instructions: List of (from_nail, to_nail) tuples
@@ -696,40 +1015,31 @@ def render_drawing_simulation(instructions, nails, canvas_size, filename, dpi):
         filename: Output PNG filename
         dpi: DPI for saving image
     """
-    # Create a white RGBA canvas with paper-like tint
     img_px = int(canvas_size)
-    canvas = Image.new('RGBA', (img_px, img_px), color=(252, 250, 245, 255))
-    
-    # Create layer for thread lines
-    layer = Image.new('RGBA', (img_px, img_px), (0, 0, 0, 0))
-    ld = ImageDraw.Draw(layer)
     
     # Thread appearance settings
-    thread_color = (0, 0, 0)  # Pure black thread for crisp simulation
+    paper_color = np.array([252, 250, 245], dtype=np.float32)  # Paper-like tint
+    thread_color = np.array([0, 0, 0], dtype=np.float32)  # Pure black thread for crisp simulation
     base_alpha = 22  # Alpha per line pass (0-255) - increased for thin threads
     line_width = max(1, int(LINE_WEIGHT * (img_px / TARGET_SIZE) / 12))  # Thinner lines for sharper look
 
+    # Count how many threads pass over each pixel
+    passes = np.zeros((img_px, img_px), dtype=np.uint16)
+
+    nails_i = nail_pixels(nails)
+    path = np.asarray(instructions, dtype=np.int32).reshape(-1, 2)
+
     print(f"Rendering {len(instructions)} thread segments...")
     
-    for idx, (a, b) in enumerate(instructions):
-        x0, y0 = nails[a]
-        x1, y1 = nails[b]
-        
-        # Draw thread line with alpha blending
-        ld.line([(x0, y0), (x1, y1)], 
-               fill=(thread_color[0], thread_color[1], thread_color[2], base_alpha), 
-               width=line_width)
-        
-        # Periodically composite to simulate accumulation and manage memory
-        if (idx + 1) % 500 == 0:
-            canvas = Image.alpha_composite(canvas, layer)
-            layer = Image.new('RGBA', (img_px, img_px), (0, 0, 0, 0))
-            ld = ImageDraw.Draw(layer)
-            if (idx + 1) % 1000 == 0:
-                print(f"  Rendered {idx + 1}/{len(instructions)} segments...")
+    for start in range(0, len(path), 1000):
+        _count_passes(nails_i, path[start:start + 1000], line_width, passes)
+        if start + 1000 <= len(path):
+            print(f"  Rendered {start + 1000}/{len(instructions)} segments...")
     
-    # Final composite
-    canvas = Image.alpha_composite(canvas, layer)
+    # Tone-map pass counts to colors with one lookup table
+    coverage = 1.0 - (1.0 - base_alpha / 255.0) ** np.arange(int(passes.max()) + 1, dtype=np.float32)
+    lut = paper_color + coverage[:, None] * (thread_color - paper_color)
+    canvas = Image.fromarray(np.rint(lut).astype(np.uint8)[passes], 'RGB')
 
     # Apply slight sharpening to emulate crisp appearance of thin black thread
     canvas = canvas.filter(ImageFilter.UnsharpMask(radius=1, percent=150, threshold=3))
@@ -737,29 +1047,27 @@ def render_drawing_simulation(instructions, nails, canvas_size, filename, dpi):
     # Draw nails as small dark circles
     draw_final = ImageDraw.Draw(canvas)
     nail_radius = max(2, int(4 * (img_px / TARGET_SIZE)))
-    for x, y in nails:
+    for x, y in nails.tolist():
         draw_final.ellipse(
             [(x - nail_radius, y - nail_radius), (x + nail_radius, y + nail_radius)], 
-            fill=(15, 15, 15, 255)
+            fill=(15, 15, 15)
         )
     
     # Add start marker (red dot on nail 0)
-    start_x, start_y = nails[0]
+    start_x, start_y = nails[0].tolist()
     marker_radius = nail_radius + 2
     draw_final.ellipse(
         [(start_x - marker_radius, start_y - marker_radius), 
          (start_x + marker_radius, start_y + marker_radius)],
-        fill=(200, 0, 0, 255)
+        fill=(200, 0, 0)
     )
     
-    # Convert to RGB for saving
-    rgb = canvas.convert('RGB')
-    rgb.save(filename, dpi=(dpi, dpi))
+    canvas.save(filename, dpi=(dpi, dpi))
     
     # Also save as PDF at A3 size for printing
     pdf_filename = filename.replace('.png', '.pdf')
     fig, ax = plt.subplots(figsize=(A3_WIDTH_IN, A3_HEIGHT_IN))
-    ax.imshow(rgb)
+    ax.imshow(canvas, interpolation='none')  # Embed as-is, not resampled to page DPI
     ax.axis('off')
     ax.text(img_px / 2, 30, 'String Art Simulation - Final Result Preview',
             fontsize=16, ha='center', va='top', weight='bold',
@@ -768,6 +1076,7 @@ def render_drawing_simulation(instructions, nails, canvas_size, filename, dpi):
     plt.tight_layout()
     with PdfPages(pdf_filename) as pdf:
         pdf.savefig(fig, bbox_inches='tight', dpi=dpi)
+    fig.clf()
     plt.close(fig)
     
     print(f"Simulation saved: {filename} and {pdf_filename}")
@@ -817,37 +1126,58 @@ def main():
     center_y = TARGET_SIZE / 2
     nails = generate_nails(NUM_NAILS, CIRCLE_RADIUS, center_x, center_y)
     print(f"  Generated {len(nails)} nails")
+    
+    # Rasterize every nail-pair line once; the greedy loop only reads this table
+    line_table = precompute_line_index(nails, TARGET_SIZE, TARGET_SIZE, ANTIALIASED_LINES)
+    print(f"  Precomputed {len(line_table[1]) - 1} nail-pair lines ({len(line_table[0])} pixels)")
     print()
     
-    # Step 3: Run string art algorithm
+    # Step 3: Run string art algorithm. Its compiled kernels release the GIL,
+    # so the nail scheme (which only depends on the nails) is exported meanwhile
     print("Step 3: Running string art algorithm...")
-    instructions = simulate_string_art(img_array, nails, NUM_STEPS, 
-                                      THREAD_STRENGTH, LINE_WEIGHT)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        simulation = executor.submit(simulate_string_art, img_array, nails, NUM_STEPS,
+                                     THREAD_STRENGTH, LINE_WEIGHT, line_table)
+        
+        # Export scheme (the figure is built once and shared by both formats)
+        if EXPORT_SCHEME_PDF or EXPORT_SCHEME_PNG:
+            scheme_fig = _build_scheme_figure(nails, CIRCLE_RADIUS, center_x, center_y, SCHEME_DPI)
+            
+            if EXPORT_SCHEME_PDF:
+                export_scheme_as_pdf(nails, CIRCLE_RADIUS, center_x, center_y,
+                                   OUTPUT_SCHEME_PDF, SCHEME_DPI, fig=scheme_fig)
+            
+            if EXPORT_SCHEME_PNG:
+                export_scheme_as_png(nails, CIRCLE_RADIUS, center_x, center_y,
+                                   OUTPUT_SCHEME_PNG, SCHEME_DPI, fig=scheme_fig)
+            
+            # Release the large A3 figure before rendering the simulation
+            scheme_fig.clf()
+            plt.close(scheme_fig)
+            del scheme_fig
+            gc.collect()
+        
+        instructions = simulation.result()
     print(f"  Generated {len(instructions)} thread segments")
     print()
     
     # Step 4: Export outputs
     print("Step 4: Exporting outputs...")
     
-    # Export scheme
-    if EXPORT_SCHEME_PDF:
-        export_scheme_as_pdf(nails, CIRCLE_RADIUS, center_x, center_y,
-                           OUTPUT_SCHEME_PDF, SCHEME_DPI)
-    
-    if EXPORT_SCHEME_PNG:
-        export_scheme_as_png(nails, CIRCLE_RADIUS, center_x, center_y,
-                           OUTPUT_SCHEME_PNG, SCHEME_DPI)
-
-    # Export a drawing simulation that renders all thread lines onto a white canvas
-    simulation_png = 'drawing_simulation.png'
-    render_drawing_simulation(instructions, nails, TARGET_SIZE, simulation_png, SCHEME_DPI)
-    print(f"Drawing simulation saved: {simulation_png}")
-    
-    # Export instructions
-    if EXPORT_FORMAT == "csv":
-        export_instructions_csv(instructions, nails, OUTPUT_INSTRUCTIONS)
-    else:
-        export_instructions_txt(instructions, OUTPUT_INSTRUCTIONS.replace('.csv', '.txt'))
+    # Write the instructions on a worker thread while the simulation renders
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        if EXPORT_FORMAT == "csv":
+            export = executor.submit(export_instructions_csv, instructions, nails, OUTPUT_INSTRUCTIONS)
+        else:
+            export = executor.submit(export_instructions_txt, instructions,
+                                     OUTPUT_INSTRUCTIONS.replace('.csv', '.txt'))
+        
+        # Export a drawing simulation that renders all thread lines onto a white canvas
+        simulation_png = 'drawing_simulation.png'
+        render_drawing_simulation(instructions, nails, TARGET_SIZE, simulation_png, SCHEME_DPI)
+        print(f"Drawing simulation saved: {simulation_png}")
+        
+        export.result()
     
     print()
     print("=" * 60)